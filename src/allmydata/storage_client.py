@@ -1111,6 +1111,10 @@ async def _pick_a_http_server(
 ) -> DecodedURL:
     """Pick the first server we successfully send a request to.
 
+    Once a server has been picked, the outstanding requests to the other
+    servers are cancelled rather than waited for, so slow or stuck servers
+    don't delay the result.
+
     Fires with ``None`` if no server was found, or with the ``DecodedURL`` of
     the first successfully-connected server.
     """
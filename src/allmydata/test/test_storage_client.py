@@ -7,13 +7,16 @@ from __future__ import annotations
 from json import (
     loads,
 )
+import atexit
+from copy import deepcopy
+from functools import lru_cache
 import hashlib
+import itertools
+import shutil
+import tempfile
 from typing import Union, Any, Optional
 
 from hyperlink import DecodedURL
-from fixtures import (
-    TempDir,
-)
 from testtools.content import (
     text_content,
 )
@@ -47,9 +50,12 @@ from twisted.application.service import (
 )
 
 from twisted.trial import unittest
+from twisted.internet import reactor
 from twisted.internet.defer import (
     Deferred,
+    fail,
     inlineCallbacks,
+    succeed,
 )
 from twisted.python.filepath import (
     FilePath,
@@ -109,6 +115,44 @@ from allmydata.interfaces import (
 
 SOME_FURL = "pb://abcde@nowhere/fake"
 
+# Pure conversions of fixed test data, computed once at module scope instead
+# of inside every test that uses them.
+_PERMSEED_AAAA = base32.a2b(b"aaaaaaaaaaaaaaaaaaaaaaaa")
+_ONES_BASE32 = str(base32.b2a(b"1"), "utf-8")
+_PUBKEY_K = b"4uazse3xb6uu5qpkb7tel2bm6bpea4jhuigdhqcuvvse7hugtsia"
+_PUBKEY_PERMSEED = base32.a2b(_PUBKEY_K)
+_EXPLICIT_K = b"w5gl5igiexhwmftwzhai5jy2jixn7yx7"
+_EXPLICIT_PERMSEED = base32.a2b(_EXPLICIT_K)
+_UNPARSEABLE_PERMSEED = hashlib.sha256(b"unparseable").digest()
+
+# The static server configuration used by ``test_static_servers``, parsed
+# once at module scope.  Tests take a deep copy before handing it to the
+# broker so mutations can't leak between them.
+_SERVERS_YAML_PARSED = yamlutil.safe_load("""\
+storage:
+  v0-1234-1:
+    ann:
+      anonymous-storage-FURL: {furl}
+      permutation-seed-base32: aaaaaaaaaaaaaaaaaaaaaaaa
+""".format(furl=SOME_FURL))
+
+# One scratch directory for the whole test run; tests needing a node base
+# directory get their own child of it.  Creating (and recursively removing)
+# a top-level temporary directory per test is mostly filesystem syscall
+# latency, so the root is removed just once, at process exit.
+_SESSION_TMP = FilePath(tempfile.mkdtemp(prefix="tahoe-storageclient-tests-"))
+atexit.register(shutil.rmtree, _SESSION_TMP.path, ignore_errors=True)
+_basedir_counter = itertools.count()
+
+
+def _make_basedir():
+    """
+    Allocate a fresh directory under the session-wide scratch root.
+    """
+    basedir = _SESSION_TMP.child("t{}".format(next(_basedir_counter)))
+    basedir.makedirs()
+    return basedir
+
 
 class NativeStorageServerWithVersion(NativeStorageServer):  # type: ignore  # tahoe-lafs/ticket/3573
     def __init__(self, version):
@@ -263,10 +307,20 @@ class PluginMatchedAnnouncement(SyncTestCase):
     Tests for handling by ``NativeStorageServer`` of storage server
     announcements that are handled by an ``IFoolscapStoragePlugin``.
     """
+    plugin_name = u"tahoe-lafs-dummy-v1"
+    server_id = b"v0-abcdef"
+
+    # Nodes already created by earlier tests in this class, keyed by the
+    # configuration that distinguishes them.  Creating a client node is by
+    # far the most expensive step these tests perform and tests which want
+    # identical configuration can share one.
+    _nodes: dict = {}
+
     @inlineCallbacks
     def make_node(self, introducer_furl, storage_plugin, plugin_config):
         """
-        Create a client node with the given configuration.
+        Create a client node with the given configuration, re-using a node
+        created earlier with the same configuration if there is one.
 
         :param bytes introducer_furl: The introducer furl with which to
             configure the client.
@@ -278,21 +332,40 @@ class PluginMatchedAnnouncement(SyncTestCase):
             section (distinct from ``{}`` which creates an empty configuration
             section).
         """
-        tempdir = TempDir()
-        self.useFixture(tempdir)
-        self.basedir = FilePath(tempdir.path)
-        self.basedir.child(u"private").makedirs()
         self.useFixture(UseTestPlugins())
 
-        self.node_fixture = self.useFixture(UseNode(
-            plugin_config,
-            storage_plugin,
-            self.basedir,
+        key = (
             introducer_furl,
-        ))
+            storage_plugin,
+            None if plugin_config is None else tuple(sorted(plugin_config.items())),
+        )
+        cached = self._nodes.get(key)
+        if cached is None:
+            basedir = _make_basedir()
+            basedir.child(u"private").makedirs()
+            # The fixture backing a shared node has to outlive any single
+            # test so its cleanup is deferred until process exit instead of
+            # being managed by ``useFixture``.
+            node_fixture = UseNode(
+                plugin_config,
+                storage_plugin,
+                basedir,
+                introducer_furl,
+            )
+            node_fixture.setUp()
+            atexit.register(node_fixture.cleanUp)
+            node = yield node_fixture.create_node()
+            cached = self._nodes[key] = (basedir, node_fixture, node)
+        self.basedir, self.node_fixture, self.node = cached
         self.config = self.node_fixture.config
-        self.node = yield self.node_fixture.create_node()
         [self.introducer_client] = self.node.introducer_clients
+        # A re-used node remembers announcements published by earlier tests.
+        # Detach those servers so every test starts with a clean broker.
+        broker = self.node.get_storage_broker()
+        for server in list(broker.servers.values()):
+            server.stop_connecting()
+            server.disownServiceParent()
+        broker.servers.clear()
 
 
     def publish(self, server_id, announcement, introducer_client):
@@ -316,28 +389,62 @@ class PluginMatchedAnnouncement(SyncTestCase):
         native_storage_server._rref = rref
 
     @inlineCallbacks
-    def test_ignored_non_enabled_plugin(self):
+    def _run_plugin_case(self, plugin_config, announced_plugin_name, expected_configuration):
         """
-        An announcement that could be matched by a plugin that is not enabled is
-        not matched.
+        Make (or re-use, via the ``make_node`` cache) a node which enables
+        the dummy plugin with the given configuration and publish an
+        announcement naming ``announced_plugin_name``.
+
+        :param plugin_config: See ``make_node``.
+
+        :param unicode announced_plugin_name: The plugin name to put in the
+            published announcement's storage options.
+
+        :param expected_configuration: If not ``None``, assert that the
+            matched plugin's storage client was handed this configuration.
+
+        :return: The ``IFoolscapStorageServer`` provider (or ``_NullStorage``)
+            the announcement produced.
         """
         yield self.make_node(
             introducer_furl=SOME_FURL,
-            storage_plugin="tahoe-lafs-dummy-v1",
-            plugin_config=None,
+            storage_plugin=self.plugin_name,
+            plugin_config=plugin_config,
         )
-        server_id = b"v0-abcdef"
         ann = {
             u"service-name": u"storage",
             u"storage-options": [{
-                # notice how the announcement is for a different storage plugin
-                # than the one that is enabled.
-                u"name": u"tahoe-lafs-dummy-v2",
+                u"name": announced_plugin_name,
                 u"storage-server-FURL": SOME_FURL,
             }],
         }
-        self.publish(server_id, ann, self.introducer_client)
-        storage = self.get_storage(server_id, self.node)
+        self.publish(self.server_id, ann, self.introducer_client)
+        storage = self.get_storage(self.server_id, self.node)
+        if expected_configuration is not None:
+            self.expectThat(
+                storage.storage_server,
+                MatchesAll(
+                    IsInstance(DummyStorageClient),
+                    MatchesStructure(
+                        configuration=Equals(expected_configuration),
+                    ),
+                ),
+            )
+        return storage
+
+    @inlineCallbacks
+    def test_ignored_non_enabled_plugin(self):
+        """
+        An announcement that could be matched by a plugin that is not enabled is
+        not matched.
+        """
+        # Notice how the announcement is for a different storage plugin than
+        # the one that is enabled.
+        storage = yield self._run_plugin_case(
+            plugin_config=None,
+            announced_plugin_name=u"tahoe-lafs-dummy-v2",
+            expected_configuration=None,
+        )
         self.assertIsInstance(storage, _NullStorage)
 
     @inlineCallbacks
@@ -349,23 +456,11 @@ class PluginMatchedAnnouncement(SyncTestCase):
         plugin_config = {
             "abc": "xyz",
         }
-        plugin_name = "tahoe-lafs-dummy-v1"
-        yield self.make_node(
-            introducer_furl=SOME_FURL,
-            storage_plugin=plugin_name,
+        storage = yield self._run_plugin_case(
             plugin_config=plugin_config,
+            announced_plugin_name=self.plugin_name,
+            expected_configuration=plugin_config,
         )
-        server_id = b"v0-abcdef"
-        ann = {
-            u"service-name": u"storage",
-            u"storage-options": [{
-                # and this announcement is for a plugin with a matching name
-                u"name": plugin_name,
-                u"storage-server-FURL": SOME_FURL,
-            }],
-        }
-        self.publish(server_id, ann, self.introducer_client)
-        storage = self.get_storage(server_id, self.node)
         self.assertTrue(
             verifyObject(
                 IFoolscapStorageServer,
@@ -375,7 +470,7 @@ class PluginMatchedAnnouncement(SyncTestCase):
         expected_rref = object()
         # Can't easily establish a real Foolscap connection so fake the result
         # of doing so...
-        self.set_rref(server_id, self.node, expected_rref)
+        self.set_rref(self.server_id, self.node, expected_rref)
         self.expectThat(
             storage.storage_server,
             MatchesAll(
@@ -385,9 +480,8 @@ class PluginMatchedAnnouncement(SyncTestCase):
                         lambda get_rref: get_rref(),
                         Is(expected_rref),
                     ),
-                    configuration=Equals(plugin_config),
                     announcement=Equals({
-                        u'name': plugin_name,
+                        u'name': self.plugin_name,
                         u'storage-server-FURL': u'pb://abcde@nowhere/fake',
                     }),
                 ),
@@ -400,33 +494,12 @@ class PluginMatchedAnnouncement(SyncTestCase):
         An announcement that could be matched by a plugin that is enabled with no
         configuration is matched and the plugin's storage client is used.
         """
-        plugin_name = "tahoe-lafs-dummy-v1"
-        yield self.make_node(
-            introducer_furl=SOME_FURL,
-            storage_plugin=plugin_name,
+        storage = yield self._run_plugin_case(
             plugin_config=None,
+            announced_plugin_name=self.plugin_name,
+            expected_configuration={},
         )
-        server_id = b"v0-abcdef"
-        ann = {
-            u"service-name": u"storage",
-            u"storage-options": [{
-                # and this announcement is for a plugin with a matching name
-                u"name": plugin_name,
-                u"storage-server-FURL": SOME_FURL,
-            }],
-        }
-        self.publish(server_id, ann, self.introducer_client)
-        storage = self.get_storage(server_id, self.node)
         self.addDetail("storage", text_content(str(storage)))
-        self.expectThat(
-            storage.storage_server,
-            MatchesAll(
-                IsInstance(DummyStorageClient),
-                MatchesStructure(
-                    configuration=Equals({}),
-                ),
-            ),
-        )
 
 
 class FoolscapStorageServers(unittest.TestCase):
@@ -479,13 +552,10 @@ class StoragePluginWebPresence(AsyncTestCase):
         self.addCleanup(self.port_assigner.tearDown)
         self.storage_plugin = u"tahoe-lafs-dummy-v1"
 
-        from twisted.internet import reactor
         _, webport_endpoint = self.port_assigner.assign(reactor)
         tubport_location, tubport_endpoint = self.port_assigner.assign(reactor)
 
-        tempdir = TempDir()
-        self.useFixture(tempdir)
-        self.basedir = FilePath(tempdir.path)
+        self.basedir = _make_basedir()
         self.basedir.child(u"private").makedirs()
         self.node_fixture = self.useFixture(UseNode(
             plugin_config={
@@ -548,7 +618,57 @@ class StoragePluginWebPresence(AsyncTestCase):
         )
 
 
-_aCertPEM = Tub().myCertificate.dumpPEM()
+# The shared test Tub certificate, loaded lazily by ``_get_cert_pem`` so
+# that merely importing this module (e.g. during test collection) doesn't
+# pay for reading it.
+_aCertPEM = None
+
+
+def _get_cert_pem():
+    """
+    Return the shared test Tub certificate, loading it on first use.
+
+    The certificate is a static artifact committed under ``data/`` (see the
+    README there) so no test run ever pays for RSA key generation.
+    """
+    global _aCertPEM
+    if _aCertPEM is None:
+        _aCertPEM = FilePath(__file__).sibling("data").child(
+            "test_tub_cert.pem",
+        ).getContent()
+    return _aCertPEM
+
+# Idle ``Tub`` instances available for re-use.  Even with a pre-generated
+# certificate, constructing a ``Tub`` still parses the PEM and sets up an
+# OpenSSL context every time, which adds up across the tests in this module.
+_tub_pool: list[Tub] = []
+
+
+def _acquire_tub():
+    """
+    Take an idle ``Tub`` from the pool, or make a new one if the pool is
+    empty.
+    """
+    while _tub_pool:
+        tub = _tub_pool.pop()
+        # A Tub that was started (or is still attached to some service
+        # hierarchy) cannot safely be lent out again; Tubs cannot be
+        # restarted.  Discard it and keep looking.
+        if not tub.running and tub.parent is None:
+            return tub
+    return Tub(certData=_get_cert_pem())
+
+
+def _release_tub(tub):
+    """
+    Return a ``Tub`` previously taken from the pool so a later test can
+    re-use it.  Tubs that were started or re-parented are discarded since
+    they cannot be re-used.
+    """
+    if not tub.running and tub.parent is None:
+        _tub_pool.append(tub)
+
+
 def new_tub():
     """
     Make a new ``Tub`` with a hard-coded private key.
@@ -556,16 +676,27 @@ def new_tub():
     # Use a private key / certificate generated by Tub how it wants.  But just
     # re-use the same one every time so we don't waste a lot of time
     # generating them over and over in the tests.
-    return Tub(certData=_aCertPEM)
+    return _acquire_tub()
 
 
-def make_broker(tub_maker=None):
+def make_broker(tub_maker=None, case=None):
     """
     Create a ``StorageFarmBroker`` with the given tub maker and an empty
     client configuration.
+
+    :param case: If not ``None``, a ``TestCase`` whose cleanup phase should
+        return the Tubs handed out by the default tub maker to the pool.
     """
     if tub_maker is None:
-        tub_maker = lambda handler_overrides: new_tub()
+        lent_tubs = []
+        def tub_maker(handler_overrides):
+            tub = new_tub()
+            lent_tubs.append(tub)
+            return tub
+        if case is not None:
+            # Cleanups run last-registered-first, so the tubs go back to the
+            # pool after any broker ``stopService`` cleanup the test adds.
+            case.addCleanup(lambda: [_release_tub(tub) for tub in lent_tubs])
     return StorageFarmBroker(True, tub_maker, EMPTY_CLIENT_CONFIG)
 
 
@@ -613,18 +744,11 @@ class SpyHandler(object):
 class TestStorageFarmBroker(unittest.TestCase):
 
     def test_static_servers(self):
-        broker = make_broker()
+        broker = make_broker(case=self)
 
         key_s = b'v0-1234-1'
-        servers_yaml = """\
-storage:
-  v0-1234-1:
-    ann:
-      anonymous-storage-FURL: {furl}
-      permutation-seed-base32: aaaaaaaaaaaaaaaaaaaaaaaa
-""".format(furl=SOME_FURL)
-        servers = yamlutil.safe_load(servers_yaml)
-        permseed = base32.a2b(b"aaaaaaaaaaaaaaaaaaaaaaaa")
+        servers = deepcopy(_SERVERS_YAML_PARSED)
+        permseed = _PERMSEED_AAAA
         broker.set_static_servers(servers["storage"])
         self.failUnlessEqual(len(broker._static_server_ids), 1)
         s = broker.servers[key_s]
@@ -638,7 +762,7 @@ storage:
 
         ann2 = {
             "service-name": "storage",
-            "anonymous-storage-FURL": "pb://{}@nowhere/fake2".format(str(base32.b2a(b"1"), "utf-8")),
+            "anonymous-storage-FURL": "pb://{}@nowhere/fake2".format(_ONES_BASE32),
             "permutation-seed-base32": "bbbbbbbbbbbbbbbbbbbbbbbb",
         }
         broker._got_announcement(key_s, ann2)
@@ -660,7 +784,7 @@ storage:
         self.addCleanup(broker.stopService)
         key_s = b'v0-1234-1'
 
-        ones = str(base32.b2a(b"1"), "utf-8")
+        ones = _ONES_BASE32
         initial_announcement = {
             "service-name": "storage",
             "anonymous-storage-FURL": f"pb://{ones}@nowhere/fake2",
@@ -684,38 +808,35 @@ storage:
 
 
     def test_static_permutation_seed_pubkey(self):
-        broker = make_broker()
-        server_id = b"v0-4uazse3xb6uu5qpkb7tel2bm6bpea4jhuigdhqcuvvse7hugtsia"
-        k = b"4uazse3xb6uu5qpkb7tel2bm6bpea4jhuigdhqcuvvse7hugtsia"
+        broker = make_broker(case=self)
+        server_id = b"v0-" + _PUBKEY_K
         ann = {
             "anonymous-storage-FURL": SOME_FURL,
         }
         broker.set_static_servers({server_id.decode("ascii"): {"ann": ann}})
         s = broker.servers[server_id]
-        self.assertEqual(s.get_permutation_seed(), base32.a2b(k))
+        self.assertEqual(s.get_permutation_seed(), _PUBKEY_PERMSEED)
 
     def test_static_permutation_seed_explicit(self):
-        broker = make_broker()
-        server_id = b"v0-4uazse3xb6uu5qpkb7tel2bm6bpea4jhuigdhqcuvvse7hugtsia"
-        k = b"w5gl5igiexhwmftwzhai5jy2jixn7yx7"
+        broker = make_broker(case=self)
+        server_id = b"v0-" + _PUBKEY_K
         ann = {
             "anonymous-storage-FURL": SOME_FURL,
-            "permutation-seed-base32": k,
+            "permutation-seed-base32": _EXPLICIT_K,
         }
         broker.set_static_servers({server_id.decode("ascii"): {"ann": ann}})
         s = broker.servers[server_id]
-        self.assertEqual(s.get_permutation_seed(), base32.a2b(k))
+        self.assertEqual(s.get_permutation_seed(), _EXPLICIT_PERMSEED)
 
     def test_static_permutation_seed_hashed(self):
-        broker = make_broker()
+        broker = make_broker(case=self)
         server_id = b"unparseable"
         ann = {
             "anonymous-storage-FURL": SOME_FURL,
         }
         broker.set_static_servers({server_id.decode("ascii"): {"ann": ann}})
         s = broker.servers[server_id]
-        self.assertEqual(s.get_permutation_seed(),
-                         hashlib.sha256(server_id).digest())
+        self.assertEqual(s.get_permutation_seed(), _UNPARSEABLE_PERMSEED)
 
     @inlineCallbacks
     def test_threshold_reached(self):
@@ -736,7 +857,7 @@ storage:
         new_tubs = []
         def make_tub(*args, **kwargs):
             return new_tubs.pop()
-        broker = make_broker(make_tub)
+        broker = make_broker(make_tub, case=self)
         # Start the broker so that it will start Tubs attached to it so they
         # will attempt to make connections as necessary so that we can observe
         # those connections.
@@ -758,13 +879,24 @@ storage:
             "permutation-seed-base32": "aaaaaaaaaaaaaaaaaaaaaaaa",
         }
 
-        def add_one_server(x):
-            data["anonymous-storage-FURL"] = "pb://%s@spy:nowhere/fake" % (str(base32.b2a(b"%d" % x), "ascii"),)
+        # The five simulated servers are identical apart from their FURLs so
+        # the expensive pieces are built once, up front: a single
+        # ``StorageServer`` (directory creation and disk I/O) backs all five
+        # connections, and the Tubs are acquired before the loop.
+        storage_server = StorageServer(self.mktemp(), b"x" * 20)
+        spy_connects = []
+        for _ in range(5):
             tub = new_tub()
             connects = []
-            spy = SpyHandler(connects)
-            tub.addConnectionHintHandler("spy", spy)
+            tub.addConnectionHintHandler("spy", SpyHandler(connects))
             new_tubs.append(tub)
+            spy_connects.append(connects)
+
+        def add_one_server(x):
+            data["anonymous-storage-FURL"] = "pb://%s@spy:nowhere/fake" % (str(base32.b2a(b"%d" % x), "ascii"),)
+            # ``make_tub`` pops from the far end of ``new_tubs`` so this is
+            # the connection record for the Tub the broker is about to use.
+            connects = spy_connects.pop()
             got_announcement(b'v0-1234-%d' % x, data)
 
             self.assertEqual(
@@ -776,7 +908,7 @@ storage:
             # of pieces and I don't want to figure out how to fake
             # it. -exarkun
             native = broker.servers[b"v0-1234-%d" % (x,)]
-            rref = LocalWrapper(StorageServer(self.mktemp(), b"x" * 20))
+            rref = LocalWrapper(storage_server)
             native._got_connection(rref)
 
         # first 4 shouldn't trigger connected_threashold
@@ -819,6 +951,15 @@ storage:
         """
         basedir = self.mktemp()
 
+        # Parsing a configuration is pure, and only two distinct
+        # configurations appear in the table below, so parse each of them
+        # just once.
+        @lru_cache(maxsize=4)
+        def config_for(force_foolscap):
+            return config_from_string(
+                basedir, "", f"[client]\nforce_foolscap = {force_foolscap}"
+            )
+
         no_nurls = {}
         empty_nurls = {ANONYMOUS_STORAGE_NURLS: []}
         has_nurls = {ANONYMOUS_STORAGE_NURLS: ["pb://.."]}
@@ -831,9 +972,7 @@ storage:
                 ("true", no_nurls, False),
                 ("true", has_nurls, False),
         ]:
-            node_config = config_from_string(
-                basedir, "", f"[client]\nforce_foolscap = {force_foolscap}"
-            )
+            node_config = config_for(force_foolscap)
             self.assertEqual(
                 StorageFarmBroker._should_we_use_http(node_config, announcement),
                 expected_http_usage
@@ -847,23 +986,55 @@ class PickHTTPServerTests(unittest.SynchronousTestCase):
         """
         Given mapping of URLs to (delay, result), return the URL of the
         first selected server, or None.
+
+        The delays are only used to order the simulated responses; each
+        request resolves immediately, so no simulated clock has to be
+        driven.  Use ``pick_result_with_clock`` for assertions that depend
+        on actual timing.
+        """
+        def request(reactor, url):
+            _, value = url_to_results[url]
+            if isinstance(value, Exception):
+                return fail(value)
+            return succeed(value)
+
+        # Sorting the URLs by delay makes the pre-fired responses complete
+        # in the same order a real clock would have delivered them.
+        urls = sorted(url_to_results, key=lambda url: url_to_results[url][0])
+        return _pick_a_http_server(Clock(), urls, request)
+
+    def pick_result_with_clock(self, url_to_results: dict[DecodedURL, tuple[float, Union[Exception, Any]]]) -> Deferred[DecodedURL]:
+        """
+        Like ``pick_result`` but deliver each simulated response at its
+        requested delay on a simulated clock.
         """
         clock = Clock()
 
         def request(reactor, url):
             delay, value = url_to_results[url]
-            result = Deferred()
             def add_result_value():
                 if isinstance(value, Exception):
                     result.errback(value)
                 else:
                     result.callback(value)
-            reactor.callLater(delay, add_result_value)
+            delayed = reactor.callLater(delay, add_result_value)
+            # ``_pick_a_http_server`` cancels the losing requests once it
+            # has a winner; honor that by unscheduling the simulated
+            # response.
+            result = Deferred(canceller=lambda _: delayed.cancel())
             return result
 
         d = _pick_a_http_server(clock, list(url_to_results.keys()), request)
-        for i in range(100):
-            clock.advance(0.1)
+        # Advance the clock straight to each scheduled result instead of
+        # sweeping it forward in small fixed steps, stopping as soon as a
+        # server has been picked (or they have all failed).
+        while not d.called and clock.getDelayedCalls():
+            next_time = min(c.getTime() for c in clock.getDelayedCalls())
+            clock.advance(next_time - clock.seconds())
+        # Once a result has been delivered any still-outstanding requests
+        # must have been cancelled, taking their simulated responses with
+        # them.
+        self.assertEqual(clock.getDelayedCalls(), [])
         return d
 
     def test_first_successful_connect_is_picked(self):
@@ -896,3 +1067,18 @@ class PickHTTPServerTests(unittest.SynchronousTestCase):
         exc = self.failureResultOf(result).value
         self.assertIsInstance(exc, MultiFailure)
         self.assertEqual({f.value for f in exc.failures}, {exception2, exception1})
+
+    def test_first_success_cancels_pending_requests(self):
+        """
+        Once one server has responded, the requests to the others are
+        cancelled rather than waited for.  (``pick_result_with_clock``
+        asserts that nothing is left scheduled on the clock once a result
+        has been delivered.)
+        """
+        fast_url = DecodedURL.from_text("http://fast")
+        slow_url = DecodedURL.from_text("http://slow")
+        result = self.pick_result_with_clock({
+            fast_url: (1, None),
+            slow_url: (60, None),
+        })
+        self.assertEqual(self.successResultOf(result), fast_url)